@@ -0,0 +1,116 @@
+import argparse
+import glob
+import gzip
+import json
+import re
+from collections import Counter
+
+
+def read_events(path: str):
+    """
+    Читает события из журнала и его сжатых архивов, начиная со старых.
+
+    Args:
+        path (str): Путь к текущему файлу журнала (events.jsonl)
+
+    Yields:
+        dict: Событие
+    """
+    # Только нумерованные архивы ротации: events.jsonl.1.gz, events.jsonl.2.gz, ...
+    archives = [
+        name for name in glob.glob(glob.escape(path) + '.*.gz')
+        if re.fullmatch(r'\d+', name[len(path) + 1:-3])
+    ]
+    archives.sort(key=lambda name: int(name[len(path) + 1:-3]), reverse=True)
+    for name in archives + [path]:
+        opener = gzip.open if name.endswith('.gz') else open
+        try:
+            with opener(name, 'rt', encoding='utf-8') as f:
+                for line in f:
+                    line = line.strip()
+                    if not line:
+                        continue
+                    try:
+                        yield json.loads(line)
+                    except json.JSONDecodeError:
+                        # Последняя строка могла быть дописана не полностью
+                        continue
+        except FileNotFoundError:
+            continue
+
+
+def percentile(values: list, p: float) -> float:
+    """Перцентиль по отсортированному списку (ближайший ранг)"""
+    if not values:
+        return 0.0
+    index = min(len(values) - 1, max(0, int(round(p / 100 * len(values))) - 1))
+    return values[index]
+
+
+def analyze(events, tenant: str = None) -> dict:
+    """
+    Считает сводную статистику по событиям.
+
+    Args:
+        events: Итерируемые события
+        tenant (str, optional): Учитывать только события этого аккаунта
+
+    Returns:
+        dict: Доли ответов и эскалаций (без ошибок API), распределение задержек, токены
+    """
+    counts = Counter()
+    latencies = []
+    tokens = Counter()
+    failed_sends = 0
+
+    for event in events:
+        if tenant is not None and event.get("tenant") != tenant:
+            continue
+        kind = event.get("event")
+        counts[kind] += 1
+        if kind == "llm_result":
+            # Ошибки API не считаются ни ответами, ни передачами менеджеру
+            if event.get("error"):
+                counts["failed"] += 1
+            else:
+                counts["escalated" if event.get("requires_manager") else "answered"] += 1
+            if "latency_ms" in event:
+                latencies.append(event["latency_ms"])
+            for key in ("prompt_tokens", "completion_tokens", "total_tokens"):
+                tokens[key] += event.get(key, 0)
+        elif kind == "send_result" and not event.get("ok"):
+            failed_sends += 1
+
+    results = counts["answered"] + counts["escalated"]
+    latencies.sort()
+    return {
+        "messages": counts["message_received"],
+        "llm_results": counts["llm_result"],
+        "failed_llm_results": counts["failed"],
+        "answer_rate": counts["answered"] / results if results else 0.0,
+        "escalation_rate": counts["escalated"] / results if results else 0.0,
+        "escalations_sent": counts["escalation"],
+        "throttled": counts["throttled"],
+        "failed_sends": failed_sends,
+        "latency_ms": {
+            "mean": sum(latencies) / len(latencies) if latencies else 0.0,
+            "p50": percentile(latencies, 50),
+            "p90": percentile(latencies, 90),
+            "p99": percentile(latencies, 99),
+            "max": latencies[-1] if latencies else 0.0
+        },
+        "tokens": dict(tokens)
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Анализ журнала событий бота")
+    parser.add_argument("path", nargs="?", default="events.jsonl", help="Файл журнала событий")
+    parser.add_argument("--tenant", help="Статистика только по указанному аккаунту")
+    args = parser.parse_args()
+
+    print(json.dumps(analyze(read_events(args.path), args.tenant), ensure_ascii=False, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,112 +1,165 @@
 import os
 import json
+import asyncio
 import logging
 from telethon import TelegramClient, events
 from dotenv import load_dotenv
-from gpt_client import GPTClient
+from openai import AsyncOpenAI
+from gpt_client import GPTClient, create_openai_client
+from quota import QuotaTracker
+from event_log import setup_logging, log_event, Timer
 from config import (
-    FINAL_SYSTEM_PROMPT, 
     MESSAGES,
-    TELEGRAM_CONFIG,
-    OPENAI_CONFIG,
-    FUNCTIONS
+    QUOTA_CONFIG,
+    LOGGING_CONFIG,
+    TenantConfig,
+    load_tenants
 )
 
 
-# Настройка логирования
-print("Starting bot initialization...")
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-    filename='bot.log'
-)
 logger = logging.getLogger(__name__)
-print("Logging configured")
 
 # Загрузка переменных окружения
-print("Loading environment variables...")
 load_dotenv()
 
 
-# Инициализация клиентов
-print("Initializing Telegram client...")
-client = TelegramClient(
-    TELEGRAM_CONFIG.session_name,
-    TELEGRAM_CONFIG.api_id,
-    TELEGRAM_CONFIG.api_hash
-)
-print("Telegram client initialized")
-
+class SupportBot:
+    """Бот поддержки одного аккаунта (школы).
 
-gpt_client = GPTClient()
-print("Initializing GPT client...")
+    Контексты диалогов, квоты и события изолированы по аккаунтам,
+    клиент OpenAI с пулом соединений общий для всех ботов процесса.
+    """
 
-# Хранение контекста диалогов
-dialogue_contexts = {}
+    def __init__(self, tenant: TenantConfig, openai_client: AsyncOpenAI):
+        self.tenant = tenant
+        self.name = tenant.name
 
-async def notify_manager(user_id: int, message: str, reason: str):
-    """Уведомление менеджера о необходимости вмешательства"""
-    try:
-        # Получаем информацию о пользователе
-        user = await client.get_entity(user_id)
-        
-        # Создаем ссылку на чат
-        if user.username:
-            chat_link = f"https://t.me/{user.username}"
-        else:
-            chat_link = f"tg://user?id={user_id}"
-            
-        manager_message = (
-            f"❗️ Требуется внимание менеджера\n"
-            f"👤 ID пользователя: {user_id}\n"
-            f"👤 Имя: {user.first_name} {user.last_name if user.last_name else ''}\n"
-            f"🔗 [Перейти в диалог с клиентом]({chat_link})\n"
-            f"💬 Сообщение: {message}\n"
-            f"📝 Причина: {reason}"
+        logger.info(f"[{self.name}] Initializing Telegram client...")
+        self.client = TelegramClient(
+            tenant.session_name,
+            tenant.api_id,
+            tenant.api_hash
         )
-        
-        # Используем ID канала из конфига
-        await client.send_message(
-            TELEGRAM_CONFIG.manager_channel_id,  # Используем число из конфига
-            manager_message,
-            parse_mode='md',
-            link_preview=False
+        self.client.add_event_handler(
+            self.handle_message,
+            events.NewMessage(incoming=True)
         )
-    except Exception as e:
-        logger.error(f"Failed to notify manager: {str(e)}")
-        # Добавим больше информации для отладки
-        logger.error(f"Channel ID: {TELEGRAM_CONFIG.manager_channel_id}")
-        logger.error(f"Message: {manager_message}")
-
-@client.on(events.NewMessage(incoming=True))
-async def handle_message(event):
-    """Обработка входящих сообщений"""
-    if event.is_private:  # Только личные сообщения
-        user_id = event.sender_id
-        message = event.message.text
 
-        # Получаем или создаем контекст диалога
-        if user_id not in dialogue_contexts:
-            dialogue_contexts[user_id] = []
+        self.gpt_client = GPTClient(tenant.system_prompt, openai_client)
+
+        # Хранение контекста диалогов
+        self.dialogue_contexts = {}
+
+        # Учет квот пользователей
+        self.quota_tracker = QuotaTracker(
+            max_requests_per_minute=QUOTA_CONFIG.max_requests_per_minute,
+            max_requests_per_hour=QUOTA_CONFIG.max_requests_per_hour,
+            max_tokens_per_hour=QUOTA_CONFIG.max_tokens_per_hour,
+            max_users=QUOTA_CONFIG.max_users
+        )
 
-        # Добавляем сообщение в контекст
-        dialogue_contexts[user_id].append({
+    def log_event(self, event: str, **fields):
+        """Запись события с указанием аккаунта"""
+        log_event(event, tenant=self.name, **fields)
+
+    async def send_reply(self, event, user_id: int, text: str, kind: str, **kwargs):
+        """Отправка ответа пользователю с записью результата в журнал событий"""
+        try:
+            await event.respond(text, **kwargs)
+            self.log_event("send_result", user_id=user_id, kind=kind, ok=True)
+        except Exception as e:
+            logger.error(f"[{self.name}] Failed to send reply to {user_id}: {str(e)}")
+            self.log_event("send_result", user_id=user_id, kind=kind, ok=False, error=str(e))
+
+    async def notify_manager(self, user_id: int, message: str, reason: str):
+        """Уведомление менеджера о необходимости вмешательства"""
+        manager_message = None
+        try:
+            # Получаем информацию о пользователе
+            user = await self.client.get_entity(user_id)
+
+            # Создаем ссылку на чат
+            if user.username:
+                chat_link = f"https://t.me/{user.username}"
+            else:
+                chat_link = f"tg://user?id={user_id}"
+
+            manager_message = (
+                f"❗️ Требуется внимание менеджера\n"
+                f"👤 ID пользователя: {user_id}\n"
+                f"👤 Имя: {user.first_name} {user.last_name if user.last_name else ''}\n"
+                f"🔗 [Перейти в диалог с клиентом]({chat_link})\n"
+                f"💬 Сообщение: {message}\n"
+                f"📝 Причина: {reason}"
+            )
+
+            # Используем ID канала менеджеров аккаунта
+            await self.client.send_message(
+                self.tenant.manager_channel_id,
+                manager_message,
+                parse_mode='md',
+                link_preview=False
+            )
+            self.log_event("escalation", user_id=user_id, reason=reason, ok=True)
+        except Exception as e:
+            self.log_event("escalation", user_id=user_id, reason=reason, ok=False, error=str(e))
+            logger.error(f"[{self.name}] Failed to notify manager: {str(e)}")
+            # Добавим больше информации для отладки
+            logger.error(f"[{self.name}] Channel ID: {self.tenant.manager_channel_id}")
+            logger.error(f"[{self.name}] Message: {manager_message}")
+
+    async def handle_message(self, event):
+        """Обработка входящих сообщений"""
+        if not event.is_private:  # Только личные сообщения
+            return
+
+        user_id = event.sender_id
+        message = event.message.text
+        self.log_event("message_received", user_id=user_id, length=len(message or ""))
+
+        # Проверяем квоты пользователя до обращения к GPT
+        quota_reason = self.quota_tracker.check(user_id)
+        if quota_reason:
+            # Реагируем только на первое сообщение сверх лимита
+            if self.quota_tracker.start_throttling(user_id):
+                logger.warning(f"[{self.name}] User {user_id} throttled: {quota_reason}")
+                if QUOTA_CONFIG.action == 'manager':
+                    await self.send_reply(event, user_id, MESSAGES["transfer_to_manager"], "transfer")
+                    await self.notify_manager(user_id, message, quota_reason)
+                else:
+                    await self.send_reply(event, user_id, MESSAGES["rate_limited"], "rate_limited")
+            self.log_event("throttled", user_id=user_id, reason=quota_reason)
+            return
+
+        # Получаем или создаем контекст диалога и добавляем в него сообщение
+        self.dialogue_contexts.setdefault(user_id, []).append({
             "is_user": True,
             "text": message
         })
 
         # Получаем ответ от AI
-        response_data = await gpt_client.get_response(
-            message, 
-            dialogue_contexts[user_id]
+        self.quota_tracker.record_request(user_id)
+        with Timer() as timer:
+            response_data = await self.gpt_client.get_response(
+                message,
+                self.dialogue_contexts[user_id]
+            )
+        self.quota_tracker.record_tokens(user_id, response_data["usage"]["total_tokens"])
+        self.log_event(
+            "llm_result",
+            user_id=user_id,
+            requires_manager=response_data["requires_manager"],
+            confidence=response_data["confidence"],
+            reason=response_data.get("reason", ""),
+            error=response_data.get("error", False),
+            latency_ms=timer.elapsed_ms,
+            **response_data["usage"]
         )
-        print('requires_manager', response_data["requires_manager"])
-        print('response', response_data["response"])
 
         # Проверяем необходимость передачи менеджеру
         if response_data["requires_manager"]:
-            await event.respond(MESSAGES["transfer_to_manager"])
-            await notify_manager(
+            await self.send_reply(event, user_id, MESSAGES["transfer_to_manager"], "transfer")
+            await self.notify_manager(
                 user_id,
                 message,
                 response_data["reason"]
@@ -114,33 +167,88 @@ async def handle_message(event):
         else:
             # Используем HTML-форматирование для переносов строк
             formatted_response = response_data["response"].replace('\\n', '<br>')
-            await event.respond(
+            await self.send_reply(
+                event,
+                user_id,
                 formatted_response,
+                "answer",
                 parse_mode='html'
             )
-            
-            # Добавляем ответ бота в контекст
-            dialogue_contexts[user_id].append({
+
+            # Добавляем ответ бота в контекст. Контекст ищем заново: пока ждали
+            # ответа, параллельный обработчик мог заменить список при очистке
+            self.dialogue_contexts[user_id].append({
                 "is_user": False,
                 "text": response_data["response"]
             })
 
         # Очистка старого контекста
-        if len(dialogue_contexts[user_id]) > 6:
-            dialogue_contexts[user_id] = dialogue_contexts[user_id][-6:]
+        if len(self.dialogue_contexts[user_id]) > 6:
+            self.dialogue_contexts[user_id] = self.dialogue_contexts[user_id][-6:]
+
+    async def start(self) -> bool:
+        """
+        Авторизация Telegram клиента.
+
+        Returns:
+            bool: True, если клиент запущен; ошибка одного аккаунта не останавливает остальные
+        """
+        try:
+            logger.info(f"[{self.name}] Starting Telegram client...")
+            await self.client.start(phone=self.tenant.phone_number)
+            logger.info(f"[{self.name}] Telegram client started successfully")
+            return True
+        except Exception as e:
+            logger.error(f"[{self.name}] Failed to start Telegram client: {str(e)}")
+            return False
+
+    async def run(self):
+        """Работа до отключения; ошибка одного аккаунта не останавливает остальные"""
+        try:
+            await self.client.run_until_disconnected()
+        except Exception as e:
+            logger.error(f"[{self.name}] Execution error: {str(e)}")
+
+    async def stop(self):
+        """Отключение Telegram клиента"""
+        try:
+            await self.client.disconnect()
+        except Exception as e:
+            logger.error(f"[{self.name}] Failed to disconnect Telegram client: {str(e)}")
 
 async def main():
-    """Запуск бота"""
+    """Запуск ботов всех аккаунтов в одном процессе"""
+    # Настройка логирования: запись на диск выполняет фоновый поток
+    log_listener = setup_logging(
+        LOGGING_CONFIG.log_file,
+        LOGGING_CONFIG.event_log_file,
+        LOGGING_CONFIG.max_bytes,
+        LOGGING_CONFIG.backup_count
+    )
+    logger.info("Starting bot initialization...")
+
+    openai_client = create_openai_client()
+    bots = []
     try:
-        print("Starting main execution...")
-        print("Starting Telegram client...")
-        await client.start(phone=TELEGRAM_CONFIG.phone_number)
-        print("Telegram client started successfully")
-        await client.run_until_disconnected()
+        for tenant in load_tenants():
+            try:
+                bots.append(SupportBot(tenant, openai_client))
+            except Exception as e:
+                logger.error(f"[{tenant.name}] Failed to initialize bot: {str(e)}")
+        # Авторизация по очереди: может потребоваться ввод кода из Telegram
+        started = [bot for bot in bots if await bot.start()]
+        if not started:
+            logger.error("No Telegram clients started")
+            return
+        await asyncio.gather(*(bot.run() for bot in started))
     except Exception as e:
-        print(f"Error in main execution: {str(e)}")
         logger.error(f"Main execution error: {str(e)}")
+    finally:
+        for bot in bots:
+            await bot.stop()
+        await openai_client.close()
+        # Дописываем оставшиеся в очереди записи
+        log_listener.stop()
 
 if __name__ == '__main__':
-    import asyncio
-    asyncio.run(main()) 
\ No newline at end of file
+    asyncio.run(main())
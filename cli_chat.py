@@ -1,17 +1,17 @@
 from gpt_client import GPTClient
 from config import OPENAI_CONFIG
+import argparse
 import json
 import asyncio
+import time
 import tracemalloc
 import tiktoken
 
-tracemalloc.start()
-
-gpt_client = GPTClient()
-
 # Хранилище контекста диалога
 
-async def test_chat():
+async def test_chat(gpt_client: GPTClient):
+    # Отслеживание памяти нужно только в интерактивном режиме
+    tracemalloc.start()
     dialogue_context = []
     while True:
         # Тестовый вопрос
@@ -46,15 +46,170 @@ async def test_chat():
         assert response is not None
         assert "response" in response
 
+def load_conversations(path: str):
+    """
+    Читает записанные диалоги из JSONL файла.
+
+    Каждая строка - объект с полем "messages": списком строк клиента или
+    сообщений в формате dialogues.json ({"author": ..., "text": ...}).
+    Воспроизводятся только сообщения клиента. Некорректная строка не
+    прерывает чтение, а возвращается с описанием ошибки.
+
+    Yields:
+        tuple: (идентификатор диалога, список сообщений клиента или None, ошибка или None)
+    """
+    with open(path, 'r', encoding='utf-8') as f:
+        for line_number, line in enumerate(f, 1):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                record = json.loads(line)
+                messages = [
+                    msg if isinstance(msg, str) else msg["text"]
+                    for msg in record.get("messages", [])
+                    if isinstance(msg, str) or msg.get("author", "Клиент") == "Клиент"
+                ]
+            except (json.JSONDecodeError, KeyError, TypeError, AttributeError) as e:
+                yield line_number, None, f"Некорректная строка {line_number}: {e!r}"
+                continue
+            yield record.get("id", line_number), messages, None
+
+async def replay_conversation(gpt_client: GPTClient, messages: list) -> dict:
+    """Воспроизводит один диалог, сохраняя контекст как в bot.py"""
+    dialogue_context = []
+    turns = []
+    for message in messages:
+        dialogue_context.append({
+            "is_user": True,
+            "text": message
+        })
+        started = time.perf_counter()
+        response = await gpt_client.get_response(message, dialogue_context)
+        turns.append({
+            "message": message,
+            "latency_ms": round((time.perf_counter() - started) * 1000, 1),
+            **response
+        })
+        if not response["requires_manager"]:
+            dialogue_context.append({
+                "is_user": False,
+                "text": response["response"]
+            })
+        if len(dialogue_context) > 6:
+            dialogue_context = dialogue_context[-6:]
+    return {"turns": turns}
+
+async def replay(gpt_client: GPTClient, input_path: str, output_path: str, workers: int) -> dict:
+    """
+    Пакетное воспроизведение диалогов через GPTClient.
+
+    Диалоги обрабатываются параллельно пулом из workers задач, сообщения
+    внутри одного диалога - последовательно. Результаты пишутся в
+    output_path по мере готовности.
+
+    Returns:
+        dict: Сводная статистика прогона
+    """
+    if workers < 1:
+        raise ValueError("Количество обработчиков должно быть не меньше 1")
+
+    # Ограниченная очередь: файл читается по мере обработки, а не целиком
+    queue = asyncio.Queue(maxsize=workers * 2)
+    stats = {
+        "conversations": 0,
+        "errors": 0,
+        "messages": 0,
+        "failed_messages": 0,
+        "escalations": 0,
+        "total_tokens": 0
+    }
+    started = time.perf_counter()
+
+    with open(output_path, 'w', encoding='utf-8') as output:
+        def write_result(conversation_id, result: dict):
+            output.write(json.dumps({"id": conversation_id, **result}, ensure_ascii=False) + "\n")
+            output.flush()
+
+        async def worker():
+            while True:
+                item = await queue.get()
+                if item is None:
+                    return
+                conversation_id, messages = item
+                try:
+                    result = await replay_conversation(gpt_client, messages)
+                except Exception as e:
+                    stats["errors"] += 1
+                    result = {"error": str(e), "turns": []}
+                for turn in result["turns"]:
+                    stats["messages"] += 1
+                    stats["total_tokens"] += turn.get("usage", {}).get("total_tokens", 0)
+                    # Ошибки API не считаются передачами менеджеру
+                    if turn.get("error"):
+                        stats["failed_messages"] += 1
+                    elif turn["requires_manager"]:
+                        stats["escalations"] += 1
+                stats["conversations"] += 1
+                write_result(conversation_id, result)
+
+        tasks = [asyncio.create_task(worker()) for _ in range(workers)]
+        try:
+            for conversation_id, messages, error in load_conversations(input_path):
+                if error:
+                    stats["errors"] += 1
+                    write_result(conversation_id, {"error": error, "turns": []})
+                    continue
+                await queue.put((conversation_id, messages))
+            for _ in tasks:
+                await queue.put(None)
+            await asyncio.gather(*tasks)
+        finally:
+            # Не оставляем обработчики ждать очередь, если чтение прервалось
+            for task in tasks:
+                task.cancel()
+
+    elapsed = time.perf_counter() - started
+    answered = stats["messages"] - stats["failed_messages"]
+    stats["elapsed"] = elapsed
+    stats["escalation_rate"] = stats["escalations"] / answered if answered else 0.0
+
+    print(f"\nДиалогов: {stats['conversations']} (ошибок: {stats['errors']})")
+    print(
+        f"Сообщений: {stats['messages']} за {elapsed:.1f} с "
+        f"({stats['messages'] / elapsed if elapsed else 0:.2f} сообщ./с), "
+        f"ошибок API: {stats['failed_messages']}"
+    )
+    print(f"Токенов: {stats['total_tokens']}")
+    print(f"Доля передач менеджеру: {stats['escalation_rate']:.1%}")
+    return stats
+
 def count_tokens(text: str, model: str = "gpt-3.5-turbo") -> int:
     """Подсчет токенов в тексте"""
     encoding = tiktoken.encoding_for_model(model)
     return len(encoding.encode(text))
 
-# Подсчет токенов в системном промпте
-from config import FINAL_SYSTEM_PROMPT
-tokens = count_tokens(FINAL_SYSTEM_PROMPT)
-print(f"Токенов в системном промпте: {tokens}")
+def positive_int(value: str) -> int:
+    """Тип аргумента командной строки: целое число не меньше 1"""
+    number = int(value)
+    if number < 1:
+        raise argparse.ArgumentTypeError("значение должно быть не меньше 1")
+    return number
 
 if __name__ == "__main__":
-    asyncio.run(test_chat())
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Консольная проверка бота")
+    parser.add_argument("--replay", help="JSONL файл с записанными диалогами для пакетного прогона")
+    parser.add_argument("--output", default="replay_results.jsonl", help="Файл для результатов прогона")
+    parser.add_argument("--workers", type=positive_int, default=8, help="Количество параллельно обрабатываемых диалогов")
+    args = parser.parse_args()
+
+    gpt_client = GPTClient()
+
+    # Подсчет токенов в системном промпте
+    tokens = count_tokens(gpt_client.system_prompt)
+    print(f"Токенов в системном промпте: {tokens}")
+
+    if args.replay:
+        asyncio.run(replay(gpt_client, args.replay, args.output, args.workers))
+    else:
+        asyncio.run(test_chat(gpt_client))
\ No newline at end of file
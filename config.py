@@ -1,4 +1,5 @@
 import json
+from functools import lru_cache
 from pathlib import Path
 from typing import Optional
 from dataclasses import dataclass
@@ -16,17 +17,22 @@ class TelegramConfig:
         self.api_hash = os.getenv('API_HASH', '')
         self.phone_number = os.getenv('PHONE_NUMBER', '')
         self.session_name = os.getenv('SESSION_NAME', 'manager_bot')
+        # Файл с описанием аккаунтов для запуска нескольких ботов в одном процессе
+        self.tenants_file = os.getenv('TENANTS_FILE', '')
         
         # Преобразуем ID канала в число
         manager_channel_id = os.getenv('MANAGER_CHANNEL_ID', '')
         try:
-            self.manager_channel_id = int(manager_channel_id)
+            self.manager_channel_id = int(manager_channel_id) if manager_channel_id else 0
         except ValueError:
             raise ValueError("MANAGER_CHANNEL_ID должен быть числом")
 
         # Валидация
         if not self.api_id or not self.api_hash:
             raise ValueError("API_ID и API_HASH обязательны для Telegram")
+        if self.tenants_file:
+            # Телефон и канал менеджеров задаются для каждого аккаунта в TENANTS_FILE
+            return
         if not self.phone_number:
             raise ValueError("PHONE_NUMBER обязателен для Telegram")
         if not self.manager_channel_id:
@@ -48,6 +54,12 @@ class OpenAIConfig:
         self.presence_penalty = float(os.getenv('PRESENCE_PENALTY', '0.6'))
         self.frequency_penalty = float(os.getenv('FREQUENCY_PENALTY', '0.0'))
 
+        # Общий пул HTTP соединений для всех ботов процесса
+        self.max_connections = int(os.getenv('OPENAI_MAX_CONNECTIONS', '20'))
+        self.max_keepalive_connections = int(os.getenv('OPENAI_MAX_KEEPALIVE_CONNECTIONS', '10'))
+        # Таймаут запроса в секундах, по умолчанию как в SDK OpenAI
+        self.timeout = float(os.getenv('OPENAI_TIMEOUT', '600'))
+
         # Валидация
         if not self.api_key:
             raise ValueError("OPENAI_API_KEY обязателен для OpenAI")
@@ -62,13 +74,55 @@ class OpenAIConfig:
             "frequency_penalty": self.frequency_penalty
         }
 
+class QuotaConfig:
+    """Конфигурация квот на запросы и токены для одного пользователя"""
+    def __init__(self):
+        """Инициализация и валидация конфигурации из переменных окружения"""
+        # 0 отключает соответствующий лимит
+        self.max_requests_per_minute = int(os.getenv('QUOTA_REQUESTS_PER_MINUTE', '6'))
+        self.max_requests_per_hour = int(os.getenv('QUOTA_REQUESTS_PER_HOUR', '60'))
+        self.max_tokens_per_hour = int(os.getenv('QUOTA_TOKENS_PER_HOUR', '200000'))
+        self.max_users = int(os.getenv('QUOTA_MAX_USERS', '10000'))
+        # throttle - молча игнорировать, manager - передать менеджеру
+        self.action = os.getenv('QUOTA_ACTION', 'throttle')
+
+        # Валидация
+        if self.action not in ('throttle', 'manager'):
+            raise ValueError("QUOTA_ACTION должен быть 'throttle' или 'manager'")
+        if min(self.max_requests_per_minute, self.max_requests_per_hour, self.max_tokens_per_hour) < 0:
+            raise ValueError("QUOTA_REQUESTS_PER_MINUTE, QUOTA_REQUESTS_PER_HOUR и QUOTA_TOKENS_PER_HOUR не могут быть отрицательными")
+        if self.max_users <= 0:
+            raise ValueError("QUOTA_MAX_USERS должен быть положительным числом")
+
+class LoggingConfig:
+    """Конфигурация логов и журнала событий"""
+    def __init__(self):
+        """Инициализация и валидация конфигурации из переменных окружения"""
+        self.log_file = os.getenv('LOG_FILE', 'bot.log')
+        self.event_log_file = os.getenv('EVENT_LOG_FILE', 'events.jsonl')
+        self.max_bytes = int(os.getenv('LOG_MAX_BYTES', str(10 * 1024 * 1024)))
+        self.backup_count = int(os.getenv('LOG_BACKUP_COUNT', '5'))
+
+        # Валидация
+        if self.max_bytes <= 0:
+            raise ValueError("LOG_MAX_BYTES должен быть положительным числом")
+        # Без архивов RotatingFileHandler не ротирует файл, а переоткрывает его на каждой записи
+        if self.backup_count < 1:
+            raise ValueError("LOG_BACKUP_COUNT должен быть не меньше 1")
+
 # Создаем объекты конфигурации
 TELEGRAM_CONFIG = TelegramConfig()
 OPENAI_CONFIG = OpenAIConfig()
+QUOTA_CONFIG = QuotaConfig()
+LOGGING_CONFIG = LoggingConfig()
 
-# Загружаем примеры диалогов
-with open('dialogues.json', 'r', encoding='utf-8') as f:
-    EXAMPLE_DIALOGUES = json.load(f)
+def load_dialogues(path: str) -> list:
+    """Загрузка примеров диалогов из JSON файла"""
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+# Файл примеров диалогов по умолчанию
+DEFAULT_DIALOGUES_FILE = 'dialogues.json'
 
 def clean_text(text: str) -> str:
     """Очистка и форматирование текста"""
@@ -80,9 +134,9 @@ def clean_text(text: str) -> str:
     text = text.replace(' .', '.').replace(' ,', ',').replace(' !', '!').replace(' ?', '?')
     return text
 
-def format_examples():
+def format_examples(dialogues: list):
     formatted = []
-    for dialogue in EXAMPLE_DIALOGUES:
+    for dialogue in dialogues:
         for msg in dialogue['messages']:
             # Сохраняем переносы строк при форматировании
             text = msg['text']
@@ -234,13 +288,31 @@ confidence: 0.0, requires_manager: true
 4. Не используй общие фразы про обращение к менеджеру
 """
 
-# Собираем финальный промпт
-FINAL_SYSTEM_PROMPT = PROMPT_START + format_examples() + POST_EXAMPLES_RULES
-print(FINAL_SYSTEM_PROMPT)
+@lru_cache(maxsize=None)
+def build_system_prompt(dialogues_file: str = DEFAULT_DIALOGUES_FILE, prompt_file: Optional[str] = None) -> str:
+    """
+    Системный промпт для базы знаний (кешируется по путям файлов).
+
+    Args:
+        dialogues_file (str): Файл примеров диалогов
+        prompt_file (str, optional): Файл шаблона промпта с местом для примеров {examples};
+            по умолчанию используются PROMPT_START и POST_EXAMPLES_RULES
+    """
+    examples = format_examples(load_dialogues(dialogues_file))
+    if not prompt_file:
+        return PROMPT_START + examples + POST_EXAMPLES_RULES
+
+    with open(prompt_file, 'r', encoding='utf-8') as f:
+        template = f.read()
+    if '{examples}' not in template:
+        raise ValueError(f"Шаблон промпта {prompt_file} должен содержать {{examples}}")
+    return template.replace('{examples}', examples)
+
 # Шаблоны сообщений
 MESSAGES = {
     "transfer_to_manager": "Я передам диалог нашему менеджеру. Он свяжется с вами в ближайшее время.",
-    "error_message": "Извините, произошла техническая ошибка. Я передам ваш вопрос менеджеру."
+    "error_message": "Извините, произошла техническая ошибка. Я передам ваш вопрос менеджеру.",
+    "rate_limited": "Вы отправляете слишком много сообщений. Пожалуйста, подождите немного."
 }
 
 # Определение функции для OpenAI
@@ -271,4 +343,61 @@ FUNCTIONS = [{
         },
         "required": ["response", "requires_manager", "reason", "confidence"]
     }
-}] 
\ No newline at end of file
+}] 
+
+
+class TenantConfig:
+    """Конфигурация одного аккаунта поддержки при запуске нескольких ботов"""
+    def __init__(self, data: dict):
+        """Инициализация и валидация конфигурации из описания аккаунта"""
+        self.name = data.get('name', '')
+        self.api_id = data.get('api_id', TELEGRAM_CONFIG.api_id)
+        self.api_hash = data.get('api_hash', TELEGRAM_CONFIG.api_hash)
+        self.phone_number = data.get('phone_number', '')
+        self.session_name = data.get('session_name', self.name)
+        self.dialogues_file = data.get('dialogues_file', DEFAULT_DIALOGUES_FILE)
+        # Собственный шаблон промпта: сведения о школе в общем промпте относятся к одной школе
+        self.prompt_file = data.get('prompt_file')
+
+        try:
+            self.manager_channel_id = int(data.get('manager_channel_id', ''))
+        except (TypeError, ValueError):
+            raise ValueError(f"manager_channel_id аккаунта '{self.name}' должен быть числом")
+
+        # Валидация
+        if not self.name:
+            raise ValueError("name обязателен для каждого аккаунта")
+        if not self.phone_number:
+            raise ValueError(f"phone_number обязателен для аккаунта '{self.name}'")
+
+    @property
+    def system_prompt(self):
+        """Системный промпт для базы знаний аккаунта"""
+        return build_system_prompt(self.dialogues_file, self.prompt_file)
+
+def load_tenants() -> list:
+    """
+    Возвращает список аккаунтов для запуска.
+
+    Если задан TENANTS_FILE - читает из него JSON список аккаунтов,
+    иначе возвращает один аккаунт из переменных окружения.
+    """
+    if not TELEGRAM_CONFIG.tenants_file:
+        return [TenantConfig({
+            "name": TELEGRAM_CONFIG.session_name,
+            "api_id": TELEGRAM_CONFIG.api_id,
+            "api_hash": TELEGRAM_CONFIG.api_hash,
+            "phone_number": TELEGRAM_CONFIG.phone_number,
+            "session_name": TELEGRAM_CONFIG.session_name,
+            "manager_channel_id": TELEGRAM_CONFIG.manager_channel_id,
+        })]
+
+    with open(TELEGRAM_CONFIG.tenants_file, 'r', encoding='utf-8') as f:
+        tenants = [TenantConfig(data) for data in json.load(f)]
+
+    # Два клиента на одном файле сессии или номере конфликтуют между собой
+    for field in ('name', 'session_name', 'phone_number'):
+        values = [getattr(tenant, field) for tenant in tenants]
+        if len(set(values)) != len(values):
+            raise ValueError(f"Значения {field} аккаунтов в TENANTS_FILE должны быть уникальными")
+    return tenants
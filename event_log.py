@@ -0,0 +1,121 @@
+import gzip
+import json
+import logging
+import os
+import queue
+import shutil
+import time
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+
+EVENT_LOGGER_NAME = 'events'
+
+
+def _gzip_namer(name: str) -> str:
+    """Имя архивного файла после ротации"""
+    return name + '.gz'
+
+
+def _gzip_rotator(source: str, dest: str):
+    """Сжимает файл при ротации и удаляет исходный"""
+    with open(source, 'rb') as src, gzip.open(dest, 'wb') as dst:
+        shutil.copyfileobj(src, dst)
+    os.remove(source)
+
+
+class JsonFormatter(logging.Formatter):
+    """Форматирует событие в одну строку JSON"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        event = {"ts": round(record.created, 3), "event": record.getMessage()}
+        event.update(getattr(record, 'fields', {}))
+        return json.dumps(event, ensure_ascii=False, default=str)
+
+
+def _rotating_handler(path: str, max_bytes: int, backup_count: int) -> RotatingFileHandler:
+    handler = RotatingFileHandler(
+        path,
+        maxBytes=max_bytes,
+        backupCount=backup_count,
+        encoding='utf-8',
+        delay=True
+    )
+    handler.namer = _gzip_namer
+    handler.rotator = _gzip_rotator
+    return handler
+
+
+def setup_logging(
+    log_file: str,
+    event_log_file: str,
+    max_bytes: int,
+    backup_count: int,
+    level: int = logging.INFO
+) -> QueueListener:
+    """
+    Настраивает неблокирующее логирование через очередь.
+
+    Обработчики в event loop только кладут записи в очередь, запись на диск,
+    ротацию и сжатие выполняет фоновый поток QueueListener.
+
+    Args:
+        log_file (str): Файл текстового лога
+        event_log_file (str): Файл структурированных событий (JSONL)
+        max_bytes (int): Размер файла, после которого выполняется ротация
+        backup_count (int): Количество хранимых сжатых архивов
+        level (int): Уровень текстового лога
+
+    Returns:
+        QueueListener: Запущенный фоновый писатель, остановить через stop()
+    """
+    log_queue = queue.SimpleQueue()
+
+    text_handler = _rotating_handler(log_file, max_bytes, backup_count)
+    text_handler.setFormatter(logging.Formatter(
+        '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+    ))
+    # События пишутся только в свой файл, текстовые записи - только в лог
+    text_handler.addFilter(lambda record: record.name != EVENT_LOGGER_NAME)
+
+    event_handler = _rotating_handler(event_log_file, max_bytes, backup_count)
+    event_handler.setFormatter(JsonFormatter())
+    event_handler.addFilter(lambda record: record.name == EVENT_LOGGER_NAME)
+
+    root = logging.getLogger()
+    root.setLevel(level)
+    root.addHandler(QueueHandler(log_queue))
+
+    events_logger = logging.getLogger(EVENT_LOGGER_NAME)
+    events_logger.setLevel(logging.INFO)
+
+    listener = QueueListener(
+        log_queue,
+        text_handler,
+        event_handler,
+        respect_handler_level=True
+    )
+    listener.start()
+    return listener
+
+
+def log_event(event: str, **fields):
+    """
+    Записывает структурированное событие.
+
+    Args:
+        event (str): Тип события, например "message_received"
+        **fields: Данные события, сериализуемые в JSON
+    """
+    logging.getLogger(EVENT_LOGGER_NAME).info(event, extra={"fields": fields})
+
+
+class Timer:
+    """Измеряет длительность блока в миллисекундах"""
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        self.elapsed_ms = 0.0
+        return self
+
+    def __exit__(self, *exc):
+        self.elapsed_ms = round((time.perf_counter() - self.start) * 1000, 1)
+        return False
@@ -1,14 +1,34 @@
 import json
-from openai import AsyncOpenAI
-from config import OPENAI_CONFIG, FINAL_SYSTEM_PROMPT, FUNCTIONS
+import httpx
+from openai import AsyncOpenAI, DefaultAsyncHttpxClient
+from config import OPENAI_CONFIG, FUNCTIONS, build_system_prompt
 import tiktoken
 
-class GPTClient:
-    def __init__(self):
-        self.client = AsyncOpenAI(
-            api_key=OPENAI_CONFIG.api_key,
-            base_url=OPENAI_CONFIG.base_url if OPENAI_CONFIG.base_url else None
+def create_openai_client() -> AsyncOpenAI:
+    """Создает клиент OpenAI с пулом соединений, общим для всех GPTClient"""
+    return AsyncOpenAI(
+        api_key=OPENAI_CONFIG.api_key,
+        base_url=OPENAI_CONFIG.base_url if OPENAI_CONFIG.base_url else None,
+        timeout=OPENAI_CONFIG.timeout,
+        # Сохраняем настройки HTTP клиента SDK, меняем только размер пула
+        http_client=DefaultAsyncHttpxClient(
+            limits=httpx.Limits(
+                max_connections=OPENAI_CONFIG.max_connections,
+                max_keepalive_connections=OPENAI_CONFIG.max_keepalive_connections
+            )
         )
+    )
+
+class GPTClient:
+    def __init__(self, system_prompt: str = None, client: AsyncOpenAI = None):
+        """
+        Args:
+            system_prompt (str, optional): Системный промпт базы знаний,
+                по умолчанию строится из dialogues.json
+            client (AsyncOpenAI, optional): Общий клиент OpenAI, по умолчанию создается свой
+        """
+        self.system_prompt = system_prompt if system_prompt is not None else build_system_prompt()
+        self.client = client if client is not None else create_openai_client()
 
     async def get_response(self, message: str, context: list = None) -> dict:
         """
@@ -23,7 +43,7 @@ class GPTClient:
         """
         try:
             messages = [
-                {"role": "system", "content": FINAL_SYSTEM_PROMPT}
+                {"role": "system", "content": self.system_prompt}
             ]
             
             if context:
@@ -50,6 +70,14 @@ class GPTClient:
                 result['requires_manager'] = True
                 result['reason'] = f"Низкая уверенность в ответе ({result['confidence']})"
                 result['response'] = ""
+
+            # Расход токенов нужен для учета квот пользователя
+            usage = response.usage
+            result['usage'] = {
+                "prompt_tokens": usage.prompt_tokens if usage else 0,
+                "completion_tokens": usage.completion_tokens if usage else 0,
+                "total_tokens": usage.total_tokens if usage else 0
+            }
             
             return result
 
@@ -58,5 +86,8 @@ class GPTClient:
                 "response": "Произошла ошибка при обработке запроса.",
                 "requires_manager": True,
                 "reason": f"Ошибка: {str(e)}",
-                "confidence": 0.0
+                "confidence": 0.0,
+                "usage": {"prompt_tokens": 0, "completion_tokens": 0, "total_tokens": 0},
+                # Отличает сбой запроса от передачи менеджеру по решению модели
+                "error": True
             }
@@ -0,0 +1,129 @@
+import time
+from collections import OrderedDict
+from typing import Callable, Optional
+
+
+class SlidingWindowCounter:
+    """Счетчик событий в скользящем окне на кольцевом буфере корзин.
+
+    Окно делится на фиксированное число корзин, поэтому и запись, и чтение
+    занимают O(число корзин) = O(1), а память не зависит от числа событий.
+    """
+    __slots__ = ('buckets', 'bucket_size', 'counts', 'stamps')
+
+    def __init__(self, window: float, buckets: int = 12):
+        self.buckets = buckets
+        self.bucket_size = window / buckets
+        self.counts = [0] * buckets
+        self.stamps = [-1] * buckets
+
+    def add(self, now: float, amount: int = 1):
+        """Добавляет amount в корзину, соответствующую моменту now"""
+        index = int(now // self.bucket_size)
+        slot = index % self.buckets
+        if self.stamps[slot] != index:
+            self.stamps[slot] = index
+            self.counts[slot] = 0
+        self.counts[slot] += amount
+
+    def total(self, now: float) -> int:
+        """Сумма по корзинам, попадающим в окно на момент now"""
+        oldest = int(now // self.bucket_size) - self.buckets
+        return sum(
+            count for count, stamp in zip(self.counts, self.stamps)
+            if stamp > oldest
+        )
+
+
+class _UserUsage:
+    """Счетчики одного пользователя"""
+    __slots__ = ('requests_minute', 'requests_hour', 'tokens_hour', 'throttled')
+
+    def __init__(self):
+        self.requests_minute = SlidingWindowCounter(60)
+        self.requests_hour = SlidingWindowCounter(3600)
+        self.tokens_hour = SlidingWindowCounter(3600)
+        self.throttled = False
+
+
+class QuotaTracker:
+    """Учет запросов и токенов по пользователям с ограничением памяти.
+
+    Хранит не более max_users пользователей: при переполнении вытесняется
+    тот, кто дольше всех не писал.
+    """
+
+    def __init__(
+        self,
+        max_requests_per_minute: int = 0,
+        max_requests_per_hour: int = 0,
+        max_tokens_per_hour: int = 0,
+        max_users: int = 10000,
+        clock: Callable[[], float] = time.monotonic
+    ):
+        self.max_requests_per_minute = max_requests_per_minute
+        self.max_requests_per_hour = max_requests_per_hour
+        self.max_tokens_per_hour = max_tokens_per_hour
+        self.max_users = max_users
+        self.clock = clock
+        self._users = OrderedDict()
+
+    def _get(self, user_id: int) -> _UserUsage:
+        usage = self._users.get(user_id)
+        if usage is None:
+            usage = self._users[user_id] = _UserUsage()
+            if len(self._users) > self.max_users:
+                self._users.popitem(last=False)
+        else:
+            self._users.move_to_end(user_id)
+        return usage
+
+    def check(self, user_id: int) -> Optional[str]:
+        """
+        Проверяет, не превышены ли квоты пользователя.
+
+        Args:
+            user_id (int): ID пользователя
+
+        Returns:
+            Optional[str]: Причина превышения или None, если лимиты не превышены
+        """
+        usage = self._get(user_id)
+        now = self.clock()
+
+        limits = (
+            (usage.requests_minute, self.max_requests_per_minute, "запросов в минуту"),
+            (usage.requests_hour, self.max_requests_per_hour, "запросов в час"),
+            (usage.tokens_hour, self.max_tokens_per_hour, "токенов в час"),
+        )
+        for counter, limit, name in limits:
+            if limit and counter.total(now) >= limit:
+                return f"Превышен лимит {name} ({limit})"
+
+        usage.throttled = False
+        return None
+
+    def start_throttling(self, user_id: int) -> bool:
+        """
+        Помечает пользователя как ограниченного.
+
+        Returns:
+            bool: True, если ограничение только что началось
+        """
+        usage = self._get(user_id)
+        if usage.throttled:
+            return False
+        usage.throttled = True
+        return True
+
+    def record_request(self, user_id: int):
+        """Учитывает запрос пользователя к GPT"""
+        usage = self._get(user_id)
+        now = self.clock()
+        usage.requests_minute.add(now)
+        usage.requests_hour.add(now)
+
+    def record_tokens(self, user_id: int, tokens: int):
+        """Учитывает токены, потраченные на ответ пользователю"""
+        if tokens:
+            self._get(user_id).tokens_hour.add(self.clock(), tokens)
@@ -6,6 +6,19 @@ import pytest
 project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 sys.path.insert(0, project_root)
 
+# Значения по умолчанию, чтобы модульные тесты могли импортировать config без .env.
+# Сначала загружаем .env: реальные значения имеют приоритет
+from dotenv import load_dotenv
+load_dotenv()
+for key, value in {
+    "API_ID": "1",
+    "API_HASH": "test",
+    "PHONE_NUMBER": "+70000000000",
+    "MANAGER_CHANNEL_ID": "-100",
+    "OPENAI_API_KEY": "test",
+}.items():
+    os.environ.setdefault(key, value)
+
 # Устанавливаем область видимости event loop для асинхронных фикстур
 pytest.ini_options = {
     "asyncio_mode": "auto",
@@ -0,0 +1,86 @@
+import json
+import pytest
+
+from cli_chat import load_conversations, replay
+
+
+class FakeGPTClient:
+    """Заглушка GPTClient: запоминает контекст каждого запроса"""
+    def __init__(self):
+        self.contexts = {}
+
+    async def get_response(self, message: str, context: list = None) -> dict:
+        self.contexts[message] = [msg["text"] for msg in context]
+        if message.startswith("сбой"):
+            return {
+                "response": "Произошла ошибка при обработке запроса.",
+                "requires_manager": True,
+                "reason": "Ошибка: 429",
+                "confidence": 0.0,
+                "usage": {"prompt_tokens": 0, "completion_tokens": 0, "total_tokens": 0},
+                "error": True
+            }
+        return {
+            "response": f"ответ на {message}",
+            "requires_manager": message.endswith("?"),
+            "reason": "",
+            "confidence": 1.0,
+            "usage": {"prompt_tokens": 8, "completion_tokens": 2, "total_tokens": 10}
+        }
+
+
+def write_conversations(path):
+    lines = [
+        json.dumps({"id": "a", "messages": [
+            {"author": "Клиент", "text": "a1"},
+            {"author": "Менеджер", "text": "ответ менеджера"},
+            {"author": "Клиент", "text": "a2"}
+        ]}, ensure_ascii=False),
+        json.dumps({"id": "b", "messages": ["b1", "b2?", "сбой b3"]}, ensure_ascii=False),
+        "{не json",
+        json.dumps({"id": "c", "messages": [{"author": "Клиент"}]}, ensure_ascii=False),
+        "",
+    ]
+    path.write_text("\n".join(lines), encoding="utf-8")
+    return str(path)
+
+
+class TestReplay:
+    """Тесты пакетного прогона записанных диалогов"""
+
+    def test_load_conversations(self, tmp_path):
+        conversations = list(load_conversations(write_conversations(tmp_path / "in.jsonl")))
+
+        assert conversations[0] == ("a", ["a1", "a2"], None)
+        assert conversations[1] == ("b", ["b1", "b2?", "сбой b3"], None)
+        assert [item[0] for item in conversations[2:]] == [3, 4]
+        assert all(item[1] is None and item[2] for item in conversations[2:])
+
+    @pytest.mark.asyncio
+    async def test_replay(self, tmp_path):
+        client = FakeGPTClient()
+        output_path = tmp_path / "out.jsonl"
+
+        stats = await replay(client, write_conversations(tmp_path / "in.jsonl"), str(output_path), 2)
+
+        # Контекст у каждого диалога свой, ответы менеджера из записи не воспроизводятся
+        assert client.contexts["a2"] == ["a1", "ответ на a1", "a2"]
+        assert client.contexts["b2?"] == ["b1", "ответ на b1", "b2?"]
+        # После передачи менеджеру ответ бота в контекст не добавляется
+        assert client.contexts["сбой b3"] == ["b1", "ответ на b1", "b2?", "сбой b3"]
+
+        assert stats["conversations"] == 2
+        assert stats["errors"] == 2
+        assert stats["messages"] == 5
+        assert stats["failed_messages"] == 1
+        assert stats["escalations"] == 1
+        assert stats["escalation_rate"] == 0.25
+        assert stats["total_tokens"] == 40
+
+        results = [json.loads(line) for line in output_path.read_text(encoding="utf-8").splitlines()]
+        assert sorted(str(result["id"]) for result in results) == ["3", "4", "a", "b"]
+
+    @pytest.mark.asyncio
+    async def test_replay_rejects_zero_workers(self, tmp_path):
+        with pytest.raises(ValueError):
+            await replay(FakeGPTClient(), write_conversations(tmp_path / "in.jsonl"), str(tmp_path / "out.jsonl"), 0)
@@ -0,0 +1,80 @@
+import logging
+import pytest
+from event_log import setup_logging, log_event
+from analyze_logs import analyze, read_events
+
+
+@pytest.fixture
+def event_log(tmp_path):
+    """
+    Настраивает журнал во временной папке.
+
+    Возвращает путь к журналу и функцию, дописывающую очередь на диск.
+    После теста восстанавливает обработчики и уровень root logger.
+    """
+    root = logging.getLogger()
+    handlers = list(root.handlers)
+    level = root.level
+    path = str(tmp_path / "events.jsonl")
+    listener = setup_logging(str(tmp_path / "bot.log"), path, 2000, 10)
+    stopped = []
+
+    def stop():
+        if not stopped:
+            listener.stop()
+            stopped.append(True)
+
+    yield path, stop
+
+    stop()
+    for handler in root.handlers[len(handlers):]:
+        root.removeHandler(handler)
+    root.setLevel(level)
+
+
+class TestEventLog:
+    """Тесты журнала событий и его анализа"""
+
+    def test_events_rotate_and_are_analyzed(self, event_log, tmp_path):
+        event_file, stop = event_log
+        for i in range(40):
+            log_event("message_received", tenant="school", user_id=i, length=3)
+            log_event(
+                "llm_result",
+                user_id=i,
+                requires_manager=i % 4 == 0,
+                confidence=1.0,
+                latency_ms=float(i),
+                total_tokens=10
+            )
+        stop()
+
+        assert list(tmp_path.glob("events.jsonl.*.gz"))
+        stats = analyze(read_events(event_file))
+        assert stats["messages"] == 40
+        assert stats["escalation_rate"] == 0.25
+        assert stats["latency_ms"]["max"] == 39.0
+        assert stats["tokens"]["total_tokens"] == 400
+        assert analyze(read_events(event_file), tenant="school")["messages"] == 40
+        assert analyze(read_events(event_file), tenant="other")["messages"] == 0
+
+    def test_api_errors_are_not_escalations(self, event_log):
+        event_file, stop = event_log
+        log_event("llm_result", requires_manager=False, error=False, total_tokens=10)
+        log_event("llm_result", requires_manager=True, error=False, total_tokens=10)
+        log_event("llm_result", requires_manager=True, error=True, total_tokens=0)
+        stop()
+
+        stats = analyze(read_events(event_file))
+        assert stats["llm_results"] == 3
+        assert stats["failed_llm_results"] == 1
+        assert stats["answer_rate"] == 0.5
+        assert stats["escalation_rate"] == 0.5
+
+    def test_stray_archives_are_ignored(self, event_log, tmp_path):
+        event_file, stop = event_log
+        log_event("message_received", user_id=1, length=3)
+        stop()
+        (tmp_path / "events.jsonl.backup.gz").write_bytes(b"")
+
+        assert analyze(read_events(event_file))["messages"] == 1
@@ -0,0 +1,54 @@
+from quota import QuotaTracker, SlidingWindowCounter
+
+
+class FakeClock:
+    """Управляемые часы для тестов"""
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class TestQuota:
+    """Тесты учета квот пользователей"""
+
+    def test_window_expires_old_events(self):
+        counter = SlidingWindowCounter(60, buckets=6)
+        counter.add(0)
+        counter.add(30, 2)
+        assert counter.total(30) == 3
+        assert counter.total(65) == 2
+        assert counter.total(200) == 0
+
+    def test_requests_per_minute(self):
+        clock = FakeClock()
+        tracker = QuotaTracker(max_requests_per_minute=2, clock=clock)
+        for _ in range(2):
+            assert tracker.check(1) is None
+            tracker.record_request(1)
+        assert tracker.check(1) is not None
+        assert tracker.check(2) is None
+        clock.now = 61
+        assert tracker.check(1) is None
+
+    def test_tokens_per_hour(self):
+        clock = FakeClock()
+        tracker = QuotaTracker(max_tokens_per_hour=1000, clock=clock)
+        tracker.record_tokens(1, 999)
+        assert tracker.check(1) is None
+        tracker.record_tokens(1, 1)
+        assert tracker.check(1) is not None
+
+    def test_throttling_reported_once(self):
+        tracker = QuotaTracker(max_requests_per_minute=1, clock=FakeClock())
+        tracker.record_request(1)
+        assert tracker.check(1) is not None
+        assert tracker.start_throttling(1)
+        assert not tracker.start_throttling(1)
+
+    def test_memory_is_bounded(self):
+        tracker = QuotaTracker(max_users=3, clock=FakeClock())
+        for user_id in range(10):
+            tracker.record_request(user_id)
+        assert list(tracker._users) == [7, 8, 9]
@@ -0,0 +1,196 @@
+import json
+import pytest
+from types import SimpleNamespace
+
+import bot
+import config
+from config import TenantConfig, load_tenants
+
+
+class FakeTelegramClient:
+    """Заглушка TelegramClient без сетевых запросов"""
+    def __init__(self, session_name, api_id, api_hash):
+        self.session_name = session_name
+        self.sent = []
+
+    def add_event_handler(self, handler, event):
+        self.handler = handler
+
+    async def get_entity(self, user_id):
+        return SimpleNamespace(username=None, first_name="Тест", last_name=None)
+
+    async def send_message(self, entity, message, **kwargs):
+        self.sent.append((entity, message))
+
+
+class FakeOpenAI:
+    """Заглушка AsyncOpenAI, запоминающая системные промпты запросов"""
+    def __init__(self):
+        self.system_prompts = []
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self.create))
+
+    async def create(self, messages, **kwargs):
+        self.system_prompts.append(messages[0]["content"])
+        arguments = json.dumps({
+            "response": "Здравствуйте!",
+            "requires_manager": False,
+            "reason": "",
+            "confidence": 1.0
+        })
+        return SimpleNamespace(
+            choices=[SimpleNamespace(message=SimpleNamespace(
+                function_call=SimpleNamespace(arguments=arguments)
+            ))],
+            usage=SimpleNamespace(prompt_tokens=100, completion_tokens=5, total_tokens=105)
+        )
+
+
+def make_event(user_id: int, text: str):
+    """Входящее личное сообщение Telegram"""
+    replies = []
+
+    async def respond(message, **kwargs):
+        replies.append(message)
+
+    return SimpleNamespace(
+        is_private=True,
+        sender_id=user_id,
+        message=SimpleNamespace(text=text),
+        respond=respond,
+        replies=replies
+    )
+
+
+def write_dialogues(path, answer: str):
+    path.write_text(json.dumps([{"messages": [
+        {"author": "Клиент", "text": "Привет"},
+        {"author": "Менеджер", "text": answer}
+    ]}], ensure_ascii=False), encoding="utf-8")
+    return str(path)
+
+
+class TestTenantConfig:
+    """Тесты конфигурации аккаунтов"""
+
+    def test_defaults(self):
+        tenant = TenantConfig({
+            "name": "school_a",
+            "phone_number": "+70000000001",
+            "manager_channel_id": -1001
+        })
+        assert tenant.session_name == "school_a"
+        assert tenant.api_id == config.TELEGRAM_CONFIG.api_id
+        assert tenant.api_hash == config.TELEGRAM_CONFIG.api_hash
+        assert tenant.dialogues_file == config.DEFAULT_DIALOGUES_FILE
+
+    @pytest.mark.parametrize("data", [
+        {"phone_number": "+70000000001", "manager_channel_id": -1001},
+        {"name": "school_a", "manager_channel_id": -1001},
+        {"name": "school_a", "phone_number": "+70000000001"},
+        {"name": "school_a", "phone_number": "+70000000001", "manager_channel_id": None},
+        {"name": "school_a", "phone_number": "+70000000001", "manager_channel_id": "abc"},
+    ])
+    def test_required_fields(self, data):
+        with pytest.raises(ValueError):
+            TenantConfig(data)
+
+    @pytest.mark.parametrize("second", [
+        {"name": "school_a", "phone_number": "+70000000002"},
+        {"name": "school_b", "phone_number": "+70000000002", "session_name": "school_a"},
+        {"name": "school_b", "phone_number": "+70000000001"},
+    ], ids=["name", "session_name", "phone_number"])
+    def test_duplicates(self, second, tmp_path, monkeypatch):
+        tenants_file = tmp_path / "tenants.json"
+        first = {"name": "school_a", "phone_number": "+70000000001", "manager_channel_id": -1001}
+        second = {"manager_channel_id": -1002, **second}
+        tenants_file.write_text(json.dumps([first, second]), encoding="utf-8")
+        monkeypatch.setattr(config.TELEGRAM_CONFIG, "tenants_file", str(tenants_file))
+
+        with pytest.raises(ValueError):
+            load_tenants()
+
+    def test_unique_tenants(self, tmp_path, monkeypatch):
+        tenants_file = tmp_path / "tenants.json"
+        tenants_file.write_text(json.dumps([
+            {"name": "school_a", "phone_number": "+70000000001", "manager_channel_id": -1001},
+            {"name": "school_b", "phone_number": "+70000000002", "manager_channel_id": -1002},
+        ]), encoding="utf-8")
+        monkeypatch.setattr(config.TELEGRAM_CONFIG, "tenants_file", str(tenants_file))
+
+        assert [tenant.name for tenant in load_tenants()] == ["school_a", "school_b"]
+
+    def test_prompt_file(self, tmp_path):
+        prompt_file = tmp_path / "prompt.txt"
+        prompt_file.write_text("Бот школы рисования.\n{examples}\nПравила.", encoding="utf-8")
+        tenant = TenantConfig({
+            "name": "school_a",
+            "phone_number": "+70000000001",
+            "manager_channel_id": -1001,
+            "dialogues_file": write_dialogues(tmp_path / "dialogues.json", "Ответ рисования"),
+            "prompt_file": str(prompt_file)
+        })
+
+        prompt = tenant.system_prompt
+        assert prompt.startswith("Бот школы рисования.")
+        assert "Ответ рисования" in prompt
+        assert config.PROMPT_START not in prompt
+
+        prompt_file.write_text("Без примеров", encoding="utf-8")
+        config.build_system_prompt.cache_clear()
+        with pytest.raises(ValueError):
+            tenant.system_prompt
+
+    def test_single_tenant_from_env(self, monkeypatch):
+        monkeypatch.setattr(config.TELEGRAM_CONFIG, "tenants_file", "")
+        tenants = load_tenants()
+
+        assert len(tenants) == 1
+        assert tenants[0].session_name == config.TELEGRAM_CONFIG.session_name
+        assert tenants[0].manager_channel_id == config.TELEGRAM_CONFIG.manager_channel_id
+
+
+@pytest.mark.asyncio
+class TestSupportBotIsolation:
+    """Тесты изоляции аккаунтов в одном процессе"""
+
+    async def test_tenants_are_isolated(self, tmp_path, monkeypatch):
+        events = []
+        monkeypatch.setattr(bot, "TelegramClient", FakeTelegramClient)
+        monkeypatch.setattr(bot, "log_event", lambda event, **fields: events.append((event, fields)))
+
+        openai_client = FakeOpenAI()
+        bots = [
+            bot.SupportBot(TenantConfig({
+                "name": name,
+                "phone_number": "+70000000001",
+                "manager_channel_id": -1001,
+                "dialogues_file": write_dialogues(tmp_path / f"{name}.json", f"Ответ {name}")
+            }), openai_client)
+            for name in ("school_a", "school_b")
+        ]
+        school_a, school_b = bots
+
+        await school_a.handle_message(make_event(1, "Привет"))
+        await school_a.handle_message(make_event(1, "Еще вопрос"))
+        await school_b.handle_message(make_event(1, "Привет"))
+
+        assert len(school_a.dialogue_contexts[1]) == 4
+        assert len(school_b.dialogue_contexts[1]) == 2
+        assert school_a.quota_tracker is not school_b.quota_tracker
+        assert school_a.quota_tracker._users[1].requests_hour.total(
+            school_a.quota_tracker.clock()
+        ) == 2
+        assert school_b.quota_tracker._users[1].tokens_hour.total(
+            school_b.quota_tracker.clock()
+        ) == 105
+
+        # Общий клиент OpenAI, но у каждого аккаунта свой промпт
+        assert "Ответ school_a" in openai_client.system_prompts[0]
+        assert "Ответ school_b" in openai_client.system_prompts[2]
+        assert "Ответ school_a" not in openai_client.system_prompts[2]
+
+        tenants = {}
+        for event, fields in events:
+            tenants.setdefault(fields["tenant"], []).append(event)
+        assert tenants["school_a"].count("message_received") == 2
+        assert tenants["school_b"].count("message_received") == 1